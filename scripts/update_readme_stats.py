@@ -2,51 +2,120 @@
 """
 Updates README.md with current repository statistics.
 Run this script before committing or set up as a GitHub Action.
+
+README.md is rendered from README.template.md; edit the template, not README.md.
+Template placeholders are {name} or {name:format_spec} for the values built in
+update_readme(); any other braces in the template are copied through unchanged.
+.readme_stats.json is generated alongside README.md as a render cache and must
+be committed together with it.
 """
 
+import hashlib
+import json
 import os
 import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Directories to exclude from stats
-EXCLUDE_DIRS = {'node_modules', '.git', '.claude', '__pycache__', 'cli'}
+# Directories to exclude from stats (pruned during the walk, never descended into)
+EXCLUDE_DIRS = frozenset({'node_modules', '.git', '.claude', '__pycache__', 'cli'})
+
+# File extensions that are counted (and line-counted), mapped to their stat key
+EXT_COUNTERS = {'.md': 'doc_files', '.py': 'py_scripts', '.js': 'js_scripts'}
+LINE_EXTS = frozenset(EXT_COUNTERS)
+SKILL_NAME = 'SKILL.md'
+
+# Top-level directories whose SKILL.md files are counted per category
+SKILL_CATEGORIES = ('frontend', 'general', 'auth')
+
+# Line counting is I/O bound, so threads overlap read latency across files
+LINE_COUNT_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+READ_CHUNK_SIZE = 1 << 20
 
-def should_exclude(path: Path) -> bool:
-    """Check if path should be excluded."""
-    parts = path.parts
-    return any(excluded in parts for excluded in EXCLUDE_DIRS)
+# README.md is rendered from this template; the root copy is a duplicate of
+# README.md, so it is left out of the stats
+README_TEMPLATE_NAME = 'README.template.md'
 
-def count_files(root_dir: Path, pattern: str) -> int:
-    """Count files matching a glob pattern, excluding certain directories."""
-    count = 0
-    for file in root_dir.rglob(pattern):
-        if not should_exclude(file):
-            count += 1
-    return count
+# A template placeholder: {name} or {name:format_spec}. Only names the script
+# provides are substituted, so other braces (JSON, JSX, ...) pass through as-is.
+PLACEHOLDER_RE = re.compile(r'\{(\w+)(?::([^{}\n]*))?\}')
 
-def count_lines(root_dir: Path, extensions: list[str]) -> int:
-    """Count total lines in files with given extensions."""
+# Sidecar file caching the rendered values, template hash and README.md hash of the last run
+STATS_CACHE_NAME = '.readme_stats.json'
+
+# Distribution chart bars are slices of one precomputed full-width bar
+CHART_BAR_WIDTH = 24
+FULL_BAR = "█" * CHART_BAR_WIDTH
+
+def count_newlines(path: str) -> int:
+    """Count lines in a file from raw bytes, reading in 1 MiB chunks."""
     total = 0
-    for ext in extensions:
-        for file in root_dir.rglob(f"*{ext}"):
-            if should_exclude(file):
-                continue
-            try:
-                total += len(file.read_text(encoding="utf-8").splitlines())
-            except (UnicodeDecodeError, PermissionError):
-                pass
+    last = b""
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    except OSError:
+        return 0
+    try:
+        while chunk := os.read(fd, READ_CHUNK_SIZE):
+            total += chunk.count(b"\n")
+            last = chunk
+    except OSError:
+        return 0
+    finally:
+        os.close(fd)
+    # Count a final line that has no trailing newline
+    if last and not last.endswith(b"\n"):
+        total += 1
     return total
 
-def count_skills_in_dir(root_dir: Path, subdir: str) -> int:
-    """Count skills in a specific directory."""
-    dir_path = root_dir / subdir
-    if not dir_path.exists():
-        return 0
-    count = 0
-    for file in dir_path.rglob("SKILL.md"):
-        if not should_exclude(file):
-            count += 1
-    return count
+def walk_stats(root: str) -> dict:
+    """Gather all repository stats in a single directory walk."""
+    stats = {
+        "total_skills": 0,
+        "doc_files": 0,
+        "py_scripts": 0,
+        "js_scripts": 0,
+        "total_lines": 0,
+    }
+    for name in SKILL_CATEGORIES:
+        stats[f"{name}_skills"] = 0
+
+    line_paths = []
+
+    for dirpath, dirs, files in os.walk(root):
+        # Prune excluded subtrees in place so os.walk never descends into them;
+        # isdisjoint short-circuits the common case with nothing to prune
+        if not EXCLUDE_DIRS.isdisjoint(dirs):
+            dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+
+        # Skill category from the top-level directory name, e.g. "frontend"
+        category = os.path.relpath(dirpath, root).split(os.sep, 1)[0]
+        skill_key = f"{category}_skills" if category in SKILL_CATEGORIES else None
+        is_root = dirpath == root
+
+        for name in files:
+            if is_root and name == README_TEMPLATE_NAME:
+                continue
+
+            # Slice the extension off the name; no per-file Path/suffix work
+            dot = name.rfind(".")
+            ext = name[dot:] if dot >= 0 else ""
+            if ext not in LINE_EXTS:
+                continue
+
+            stats[EXT_COUNTERS[ext]] += 1
+            if name == SKILL_NAME:
+                stats["total_skills"] += 1
+                if skill_key:
+                    stats[skill_key] += 1
+
+            line_paths.append(os.path.join(dirpath, name))
+
+    with ThreadPoolExecutor(max_workers=LINE_COUNT_WORKERS) as pool:
+        stats["total_lines"] = sum(pool.map(count_newlines, line_paths))
+
+    return stats
 
 def format_number(n: int) -> str:
     """Format number with commas and + for large numbers."""
@@ -54,34 +123,50 @@ def format_number(n: int) -> str:
         return f"{n:,}+"
     return str(n)
 
-def update_readme(root_dir: Path):
-    """Update README.md with current stats."""
-    readme_path = root_dir / "README.md"
+def chart_values(prefix: str, count: int, total: int) -> dict:
+    """Template values for one line of the skills distribution chart."""
+    pct = count * 100 // total if total else 0
+    bar = FULL_BAR[:max(1, CHART_BAR_WIDTH * pct // 100)] if count > 0 else ""
+    return {
+        f"{prefix}_bar": bar,
+        f"{prefix}_skills": count,
+        f"{prefix}_s": "s" if count != 1 else "",
+        f"{prefix}_pct": pct,
+    }
 
-    if not readme_path.exists():
-        print("README.md not found!")
-        return False
+def render_template(template: str, values: dict) -> str:
+    """Substitute known {name} / {name:spec} placeholders, leaving other braces alone."""
+    def replace(match: re.Match) -> str:
+        name, spec = match.group(1), match.group(2)
+        if name not in values:
+            return match.group(0)
+        return format(values[name], spec or "")
+
+    return PLACEHOLDER_RE.sub(replace, template)
+
+def update_readme(root_dir: str):
+    """Render README.md from README.template.md with current stats."""
+    readme_path = os.path.join(root_dir, "README.md")
+    template_path = os.path.join(root_dir, README_TEMPLATE_NAME)
 
-    # Gather stats
-    total_skills = count_files(root_dir, "SKILL.md")
-    doc_files = count_files(root_dir, "*.md")
-    py_scripts = count_files(root_dir, "*.py")
-    js_scripts = count_files(root_dir, "*.js")
-    total_lines = count_lines(root_dir, [".md", ".py", ".js"])
+    try:
+        with open(template_path, "rb") as f:
+            template_bytes = f.read()
+    except FileNotFoundError:
+        print(f"{README_TEMPLATE_NAME} not found!")
+        return False
 
-    # Count skills by category
-    frontend_skills = count_skills_in_dir(root_dir, "frontend")
-    general_skills = count_skills_in_dir(root_dir, "general")
-    auth_skills = count_skills_in_dir(root_dir, "auth")
+    # Gather stats in a single pass
+    stats = walk_stats(root_dir)
+    total_skills = stats["total_skills"]
+    doc_files = stats["doc_files"]
+    py_scripts = stats["py_scripts"]
+    js_scripts = stats["js_scripts"]
+    total_lines = stats["total_lines"]
+    category_skills = {name: stats[f"{name}_skills"] for name in SKILL_CATEGORIES}
 
     # Determine categories
-    categories = []
-    if frontend_skills > 0:
-        categories.append("Frontend")
-    if general_skills > 0:
-        categories.append("General")
-    if auth_skills > 0:
-        categories.append("Auth")
+    categories = [name.capitalize() for name, count in category_skills.items() if count > 0]
 
     category_str = f"{len(categories)} ({', '.join(categories)})"
 
@@ -91,89 +176,90 @@ def update_readme(root_dir: Path):
     print(f"   Python Scripts: {py_scripts}")
     print(f"   JS Scripts: {js_scripts}")
     print(f"   Lines: {total_lines}")
-    print(f"   Frontend: {frontend_skills}, General: {general_skills}, Auth: {auth_skills}")
-
-    # Read README
-    content = readme_path.read_text(encoding="utf-8")
-
-    # Update stats table
-    replacements = [
-        (r'(\| 🎯 \*\*Total Skills\*\*\s*\|)\s*\d+\s*\|', f'\\1 {total_skills} |'),
-        (r'(\| 📄 \*\*Documentation Files\*\*\s*\|)\s*\d+\s*\|', f'\\1 {doc_files} |'),
-        (r'(\| 🐍 \*\*Utility Scripts\*\*\s*\|)\s*\d+\s*\|', f'\\1 {py_scripts + js_scripts} |'),
-        (r'(\| 📝 \*\*Lines of Content\*\*\s*\|)\s*[\d,]+\+?\s*\|', f'\\1 {format_number(total_lines)} |'),
-        (r'(\| 📂 \*\*Categories\*\*\s*\|)\s*[^\|]+\|', f'\\1 {category_str} |'),
-    ]
-
-    for pattern, replacement in replacements:
-        content = re.sub(pattern, replacement, content)
-
-    # Update distribution chart
-    if total_skills > 0:
-        frontend_pct = int((frontend_skills / total_skills) * 100)
-        general_pct = int((general_skills / total_skills) * 100)
-        auth_pct = int((auth_skills / total_skills) * 100)
-
-        # Generate bar charts (24 chars max width)
-        frontend_bar = "█" * max(1, int(24 * frontend_pct / 100)) if frontend_skills > 0 else ""
-        general_bar = "█" * max(1, int(24 * general_pct / 100)) if general_skills > 0 else ""
-        auth_bar = "█" * max(1, int(24 * auth_pct / 100)) if auth_skills > 0 else ""
-
-        # Update the ASCII chart lines
-        content = re.sub(
-            r'Frontend Skills\s+█*\s+\d+ skills? \(\d+%\)',
-            f'Frontend Skills     {frontend_bar.ljust(18)}  {frontend_skills} skill{"s" if frontend_skills != 1 else ""} ({frontend_pct}%)',
-            content
-        )
-        content = re.sub(
-            r'General Skills\s+█*\s+\d+ skills? \(\d+%\)',
-            f'General Skills      {general_bar.ljust(18)}  {general_skills} skill{"s" if general_skills != 1 else ""} ({general_pct}%)',
-            content
-        )
-
-        # Add or update Auth line if it exists
-        if auth_skills > 0:
-            if 'Auth Skills' not in content:
-                # Add auth line after General Skills line
-                content = re.sub(
-                    r'(General Skills\s+█+\s+\d+ skills? \(\d+%\))',
-                    f'\\1\n\nAuth Skills         {auth_bar.ljust(18)}  {auth_skills} skill{"s" if auth_skills != 1 else ""} ({auth_pct}%)',
-                    content
-                )
-            else:
-                content = re.sub(
-                    r'Auth Skills\s+█*\s+\d+ skills? \(\d+%\)',
-                    f'Auth Skills         {auth_bar.ljust(18)}  {auth_skills} skill{"s" if auth_skills != 1 else ""} ({auth_pct}%)',
-                    content
-                )
-
-    # Write updated README
-    readme_path.write_text(content, encoding="utf-8")
-    print("[OK] README.md updated successfully!")
+    print("   " + ", ".join(f"{name.capitalize()}: {count}" for name, count in category_skills.items()))
+
+    values = {
+        "total_skills": total_skills,
+        "doc_files": doc_files,
+        "utility_scripts": py_scripts + js_scripts,
+        "total_lines": format_number(total_lines),
+        "categories": category_str,
+    }
+    for name, count in category_skills.items():
+        values.update(chart_values(name, count, total_skills))
+
+    try:
+        with open(readme_path, encoding="utf-8") as f:
+            original = f.read()
+    except FileNotFoundError:
+        original = None
+
+    # Skip rendering when the rendered values and the template are unchanged
+    # since the last run and README.md is still exactly what that run wrote.
+    # Caching the values (not the raw stats) means changes to formatting such as
+    # CHART_BAR_WIDTH also invalidate the cache; the README hash catches a stale
+    # or hand-edited README.md.
+    cache_path = os.path.join(root_dir, STATS_CACHE_NAME)
+    cache = dict(values, template_sha256=hashlib.sha256(template_bytes).hexdigest())
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        cached = None
+    if original is not None:
+        readme_sha256 = hashlib.sha256(original.encode("utf-8")).hexdigest()
+        if cached == dict(cache, readme_sha256=readme_sha256):
+            print("[OK] Stats unchanged, README.md not touched")
+            return True
+
+    template = template_bytes.decode("utf-8").replace("\r\n", "\n")
+    try:
+        content = render_template(template, values)
+    except ValueError as e:
+        print(f"[ERROR] Bad placeholder format in {README_TEMPLATE_NAME}: {e}")
+        return False
+
+    if content == original:
+        print("[OK] README.md unchanged")
+    else:
+        # Write updated README via a sibling temp file so an interrupted run
+        # never leaves a partially written README behind
+        tmp_path = readme_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content.encode("utf-8"))
+            os.replace(tmp_path, readme_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        print("[OK] README.md updated successfully!")
+
+    cache["readme_sha256"] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    with open(cache_path, "w", encoding="utf-8", newline="\n") as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+        f.write("\n")
     return True
 
 def main():
-    # Fix Windows console encoding
-    import sys
-    if sys.platform == "win32":
+    # Fix Windows console encoding, unless stdout is already UTF-8
+    if sys.platform == "win32" and (sys.stdout.encoding or "").lower() not in ("utf-8", "utf8"):
         sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
-    # Find repository root (where README.md is)
+    # Find repository root (where README.template.md is)
     script_dir = Path(__file__).parent
     root_dir = script_dir.parent
 
     # Verify we're in the right place
-    if not (root_dir / "README.md").exists():
+    if not (root_dir / README_TEMPLATE_NAME).exists():
         # Try current working directory
         root_dir = Path.cwd()
 
-    if not (root_dir / "README.md").exists():
-        print("[ERROR] Could not find README.md. Run from repository root.")
+    if not (root_dir / README_TEMPLATE_NAME).exists():
+        print(f"[ERROR] Could not find {README_TEMPLATE_NAME}. Run from repository root.")
         return 1
 
     print(f"[INFO] Repository: {root_dir}")
-    update_readme(root_dir)
-    return 0
+    return 0 if update_readme(str(root_dir)) else 1
 
 if __name__ == "__main__":
     exit(main())